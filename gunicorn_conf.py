@@ -0,0 +1,21 @@
+"""gunicorn 部署配置（Linux）：gunicorn -c gunicorn_conf.py src.web:app
+
+只开 1 个进程：PLC 连接、执行计数和 YOLO 模型都是进程内单例，多进程会各自建连、各自加载模型。
+并发靠线程：snap7 通讯与 torch 推理在 C 层释放 GIL，/plc/status 轮询可与 /detect 推理重叠；
+PLCManager 内部用锁串行化 PLC socket；ModelManager 用锁串行化模型加载，并按模型加锁串行化推理
+（Ultralytics predictor 非线程安全），并发的 /detect 在同一模型上排队。
+"""
+import os
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = 1
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+timeout = 120  # 首次请求可能触发模型导出/预热
+
+
+def post_worker_init(worker):
+    # 进程就绪后立即在后台预热模型并启动 PLC 保活，不等首个请求
+    from src.web import start_background_tasks
+
+    start_background_tasks()
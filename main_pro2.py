@@ -1,12 +1,17 @@
 import sys
 import os
+import logging
+import struct
 import time
 import warnings
 import threading
+import queue
+from pathlib import Path
 import cv2
 import numpy as np
 import snap7
-from PyQt5.QtCore import QTimer, Qt
+import torch
+from PyQt5.QtCore import QEvent, QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap, QFont
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout,
@@ -14,10 +19,22 @@ from PyQt5.QtWidgets import (
 )
 from ultralytics import YOLO
 
+from src import config
+from src.runtime import export_runtime, select_backend
+
+try:
+    from numba import njit
+except ImportError:  # 未安装 numba 时按普通 NumPy 函数执行
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 # ================= PLC 通信工具函数 =================
 PLC_POLL_INTERVAL_MS = 50
+PLC_CHECK_INTERVAL_MS = 10  # 界面定时器只读取轮询线程缓存的值，开销很小，可更频繁
 PLC_RETRY_DELAY_SEC = 0.05
 PLC_FAST_TRIGGER_WINDOW_SEC = 0.1
+_S16 = struct.Struct('>h')  # DBW：大端有符号16位
+_S16X2 = struct.Struct('>hh')  # DBW0+DBW2 合并读写
 
 def plc_connect(ip, conn_type, rack=0, slot=1):
     client = snap7.client.Client()
@@ -42,7 +59,7 @@ def plc_con_close(client):
 def read_word(client, offset, log=True):
     try:
         data = client.db_read(4, offset, 2)
-        value = int.from_bytes(data, byteorder='big', signed=True)
+        value, = _S16.unpack_from(data)
         if log:
             print(f"[PLC读取] 读取 DB4.DBW{offset} 的值为 {value}")
         return value
@@ -54,7 +71,7 @@ def write_word(client, offset, value, max_retries=3):
     value = max(-32768, min(32767, int(value)))
     for attempt in range(max_retries):
         try:
-            client.db_write(4, offset, value.to_bytes(2, byteorder='big', signed=True))
+            client.db_write(4, offset, _S16.pack(value))
             print(f"[PLC写回] 成功写入值 {value} 到 DB4.DBW{offset}")
             return True
         except Exception as e:
@@ -66,9 +83,7 @@ def write_word(client, offset, value, max_retries=3):
 def write_result(client, result_value, status_value=2, max_retries=3):
     status_value = max(-32768, min(32767, int(status_value)))
     result_value = max(-32768, min(32767, int(result_value)))
-    payload = status_value.to_bytes(2, byteorder='big', signed=True) + result_value.to_bytes(
-        2, byteorder='big', signed=True
-    )
+    payload = _S16X2.pack(status_value, result_value)
     for attempt in range(max_retries):
         try:
             # DBW0(状态) 与 DBW2(结果) 合并写入，减少一次通讯开销
@@ -81,8 +96,99 @@ def write_result(client, result_value, status_value=2, max_retries=3):
     print("[PLC写入失败] 多次尝试写入 DB4.DBW0/DBW2 仍失败，放弃")
     return False
 
+# ================= 模型加载（TensorRT/OpenVINO 加速） =================
+MODEL_WARMUP_RUNS = 3  # 启动预热次数，消除首次推理的冷启动耗时
+DEBUG_LOG = os.getenv('RS_DEBUG', '0') == '1'  # 逐框检测日志，生产环境关闭以省去格式化与控制台I/O
+# 推理尺寸/阈值/后端与 Web 端同源（src/config.py，可用 YOLO_IMGSZ、YOLO_CONF、YOLO_BACKEND 等环境变量覆盖）
+
+def load_model(model_path):
+    """加载YOLO模型；.pt 权重首次运行时导出为加速格式（src.runtime，与 Web 端共用）并缓存在同目录"""
+    target = export_runtime(Path(model_path))
+    print(f"[模型加载] 使用 {select_backend()} 推理引擎：{target}")
+    return YOLO(str(target), task='detect')
+
+def class_names_of(model):
+    """类别名称与 Web 端同源（config.translate_names）：模型自带 names 转中文，取不到时用 FALLBACK_NAMES"""
+    return tuple(config.translate_names(getattr(model, 'names', None) or {}))
+
+@njit(cache=True)
+def pick_best_and_prepare(xyxy, confs, thr):
+    """按置信度过滤检测框并找出最优目标；返回 (最优下标或-1, 保留下标, 保留框int32坐标)"""
+    keep = np.flatnonzero(confs > thr)
+    boxes = xyxy[keep].astype(np.int32)
+    best_idx = -1
+    if keep.size > 0:
+        best_idx = keep[np.argmax(confs[keep])]
+    return best_idx, keep, boxes
+
+# ================= 摄像头采集线程 =================
+CAMERA_STALE_SEC = 0.2  # 约 6 个帧周期（30fps）无新帧即视为采集失败
+
+class CameraWorker(threading.Thread):
+    """后台线程持续读取摄像头，只保留最新一帧（新帧覆盖旧帧，不排队）"""
+    def __init__(self, capture):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 驱动侧只缓存1帧，避免取到旧画面
+        self._lock = threading.Lock()
+        self._latest = None
+        self._latest_ts = 0.0  # 最新一帧的采集时间（monotonic）
+        self._running = True
+
+    def run(self):
+        while self._running:
+            ret, frame = self.capture.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._lock:
+                self._latest = frame
+                self._latest_ts = time.monotonic()
+
+    def get_latest(self, max_age=None):
+        """返回最新一帧的引用；尚无画面，或指定 max_age 且该帧已超过 max_age 秒未更新（摄像头断开/卡死）时为 None"""
+        with self._lock:
+            if max_age is not None and time.monotonic() - self._latest_ts > max_age:
+                return None
+            return self._latest
+
+    def stop(self):
+        self._running = False
+        self.join(timeout=1)
+
+# ================= PLC 轮询线程 =================
+class PLCPoller(threading.Thread):
+    """后台线程独占轮询 DB4.DBW0 并发布最新值，界面线程不再直接做 snap7 通讯"""
+    def __init__(self, get_client, lock, interval_sec):
+        super().__init__(daemon=True)
+        self.get_client = get_client  # 返回当前可用的 client（重连后会更换），未连接时返回 None
+        self.lock = lock  # 与推理线程的读写共用，snap7 client 非线程安全
+        self.interval_sec = interval_sec
+        self.latest = (None, 0.0)  # (DBW0值, 读取时间)，整体替换，读取方拿到的总是一致的一对
+        self._running = True
+
+    def run(self):
+        while self._running:
+            client = self.get_client()
+            if client is not None:
+                with self.lock:
+                    self.latest = (read_word(client, 0, log=False), time.time())
+            time.sleep(self.interval_sec)
+
+    def publish(self, value):
+        """写回 PLC 后同步更新缓存，避免旧的触发值再次启动识别（调用方需持有 lock）"""
+        self.latest = (value, time.time())
+
+    def stop(self):
+        self._running = False
+        self.join(timeout=1)
+
 # ================= 主窗口类（核心功能） =================
 class GinsengClassifierGUI(QWidget):
+    # 推理线程 → 主线程的界面更新信号（Qt控件非线程安全，默认排队连接）
+    class_updated = pyqtSignal(int, int, bool)  # 类别ID、累计次数、是否默认归类
+    frame_ready = pyqtSignal(np.ndarray)  # 带标注的画面
+
     def __init__(self, model_path, plc_ip):
         super().__init__()
         warnings.filterwarnings('ignore', category=DeprecationWarning)
@@ -94,42 +200,84 @@ class GinsengClassifierGUI(QWidget):
         self.setStyleSheet('background:#1e1e2f; color:#eee;')
 
         # 核心组件初始化
-        self.model = YOLO(model_path, task='detect')  # 加载YOLO模型（支持.pt/.xml格式）
+        self.model = load_model(model_path)  # 加载YOLO模型（.pt自动导出TensorRT/OpenVINO，也支持.xml）
+        # 推理输入缓冲：每帧复用同一块内存，CUDA 下用锁页内存支持异步拷贝到显存
+        use_cuda = torch.cuda.is_available()
+        self._rgb_host = torch.empty((config.IMG_SIZE, config.IMG_SIZE, 3), dtype=torch.uint8, pin_memory=use_cuda)
+        self._rgb_buf = self._rgb_host.numpy()  # 与 _rgb_host 共享内存，供 cv2 直接写入
+        self._infer_tensor = torch.empty(
+            (1, 3, config.IMG_SIZE, config.IMG_SIZE), dtype=torch.float32, device='cuda:0' if use_cuda else 'cpu'
+        )
+        # 推理参数：阈值交给模型自带的 NMS，CUDA 下启用 FP16
+        self._predict_args = dict(
+            imgsz=config.IMG_SIZE, conf=config.PREDICT_CONF, iou=config.IOU_THRESHOLD,
+            max_det=config.MAX_DET, half=use_cuda, verbose=False,
+        )
+        if use_cuda:
+            self._predict_args['device'] = 0
         self.plc_ip = plc_ip
         self.plc = plc_connect(plc_ip, 2)
         self.plc_connected = self.plc is not None
         self.plc_count = 0
         self.plc_status = ''
 
-        # 类别映射（已修改为“分叉”）
-        self.class_names = {
-            0: '病斑', 1: '成品人参', 2: '带泥', 3: '分叉',
-            4: '磕巴', 5: '烂头', 6: '锈病', 7: '芽孢'
-        }
-        self.level_counts = {i: 0 for i in range(8)}  # 8类统计初始化
+        # 类别名称（元组，按类别ID下标访问）
+        self.class_names = class_names_of(self.model)
+        self.level_counts = np.zeros(len(self.class_names), dtype=np.int64)  # 各类别统计初始化
+        self._last_rendered = np.zeros_like(self.level_counts)  # 各类别面板上次显示的计数
+        self._title_fmt = [f'{name}: ' for name in self.class_names]
+        self._label_cache = {}  # (类别, 置信度百分位) -> (标签位图掩码, 文字高度)
 
         # 摄像头初始化
         self.capture = cv2.VideoCapture(0)
         if not self.capture.isOpened():
             raise RuntimeError('无法打开摄像头，请检查设备连接')
-
-        # 并发控制锁（避免重复识别）
-        self.infer_lock = threading.Lock()
+        # 直接按模型输入尺寸采集（MJPG 降低USB带宽），推理时无需再缩放
+        self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, config.IMG_SIZE)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, config.IMG_SIZE)
+        print(f"[摄像头] 采集分辨率 {int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))}"
+              f"x{int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))}")
+        self.camera = CameraWorker(self.capture)
+        self.camera.start()
+
+        # 常驻推理线程 + 单槽队列：识别进行中再来的触发合并为一次，不再每次新建线程
+        self._infer_q = queue.Queue(maxsize=1)
+        threading.Thread(target=self._infer_worker, daemon=True).start()
         self.last_plc_status = None
         self.last_plc_ts = 0.0
+        self._plc_offline_logged = False  # 断开提示只在状态变化时输出一次
+
+        # PLC 轮询线程（与推理线程共用 plc_lock 串行访问 snap7）
+        self.plc_lock = threading.Lock()
+        self.plc_poller = PLCPoller(
+            lambda: self.plc if self.plc_connected else None, self.plc_lock, PLC_POLL_INTERVAL_MS / 1000
+        )
+        self.plc_poller.start()
+
+        # 预览缓冲（按标签尺寸预分配，标签尺寸变化时重算）
+        self._preview_key = None
+        self._preview_buf = None
+        self._last_preview_frame = None
 
         # 初始化UI
         self.init_ui()
+        self.class_updated.connect(self._on_class_update)
+        self.frame_ready.connect(self._on_frame_update)
 
         # 双定时器配置（画面刷新+PLC信号检测分离，避免卡顿）
         self.plc_timer = QTimer(self)
         self.plc_timer.timeout.connect(self.check_plc_signal)
-        self.plc_timer.start(PLC_POLL_INTERVAL_MS)  # 更快检测PLC信号，降低触发延迟
+        self.plc_timer.start(PLC_CHECK_INTERVAL_MS)  # 更快检测PLC信号，降低触发延迟
 
         self.video_timer = QTimer(self)
         self.video_timer.timeout.connect(self.update_camera_frame)
         self.video_timer.start(30)  # 30ms刷新一次画面（约33fps）
 
+        # 后台预热模型，预热完成前不响应PLC触发
+        self.model_ready = threading.Event()
+        threading.Thread(target=self.warmup_model, daemon=True).start()
+
     def init_ui(self):
         # 水平分割器（左侧视频区+右侧信息面板）
         splitter = QSplitter(Qt.Horizontal, self)
@@ -139,6 +287,7 @@ class GinsengClassifierGUI(QWidget):
         self.video_label = QLabel()
         self.video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_label.setStyleSheet('border:3px solid #444; background:#000;')
+        self.video_label.installEventFilter(self)  # 标签尺寸变化时重算预览缓冲
         splitter.addWidget(self.video_label)
 
         # 右侧：信息统计面板
@@ -156,9 +305,8 @@ class GinsengClassifierGUI(QWidget):
 
         # 各类别统计GroupBox
         self.level_boxes = {}
-        for cls_id in sorted(self.level_counts):
-            name = self.class_names[cls_id]
-            box = QGroupBox(f'{name}: 0')
+        for cls_id in range(len(self.level_counts)):
+            box = QGroupBox(self._title_fmt[cls_id] + '0')
             box.setFixedHeight(60)
             box.setStyleSheet('QGroupBox{background:#3e3e4e; border:1px solid #555; border-radius:5px;}')
             vbox.addWidget(box)
@@ -212,6 +360,20 @@ class GinsengClassifierGUI(QWidget):
         """切换全屏/退出全屏"""
         self.setWindowState(self.windowState() ^ Qt.WindowFullScreen)
 
+    def _on_class_update(self, cls_id, count, is_default):
+        """主线程中刷新识别结果（只重绘计数有变化的类别面板）"""
+        if count != self._last_rendered[cls_id]:
+            self.level_boxes[cls_id].setTitle(self._title_fmt[cls_id] + str(count))
+            self._last_rendered[cls_id] = count
+        suffix = '（默认）' if is_default else ''
+        self.current_box.setTitle(f'当前类别: {self.class_names[cls_id]}{suffix}')
+        self.update_plc_status()
+
+    def _on_frame_update(self, frame):
+        """主线程中显示带标注的画面"""
+        self._last_preview_frame = frame
+        self.show_preview(frame)
+
     def update_plc_status(self):
         """更新PLC连接状态显示"""
         if self.plc and self.plc.get_connected():
@@ -224,131 +386,227 @@ class GinsengClassifierGUI(QWidget):
 
     def reconnect_plc(self):
         """手动重连PLC"""
-        if self.plc:
-            plc_con_close(self.plc)
-        self.plc = plc_connect(self.plc_ip, 2)
+        with self.plc_lock:
+            if self.plc:
+                plc_con_close(self.plc)
+            self.plc = plc_connect(self.plc_ip, 2)
         self.update_plc_status()
 
     # ================= 核心业务逻辑 =================
+    def warmup_model(self):
+        """用空白帧预跑几次推理（子线程中执行）"""
+        dummy = np.zeros((config.IMG_SIZE, config.IMG_SIZE, 3), dtype=np.uint8)
+        start_time = time.time()
+        try:
+            for _ in range(MODEL_WARMUP_RUNS):
+                self.run_model(dummy)
+            # 同时触发 numba 编译（已有磁盘缓存时直接加载）
+            pick_best_and_prepare(np.zeros((1, 4), np.float32), np.zeros(1, np.float32), config.PREDICT_CONF)
+            print(f"[模型预热] 完成，耗时 {int((time.time() - start_time) * 1000)} 毫秒")
+        except Exception as e:
+            print(f"[模型预热异常] {e}")
+        finally:
+            self.model_ready.set()
+
     def check_plc_signal(self):
         """检测PLC触发信号（DB4.DBW0=1时启动识别）"""
+        if not self.model_ready.is_set():
+            return
         if not self.plc_connected:
-            print("[PLC信号] 未连接到 PLC，跳过检测")
+            if not self._plc_offline_logged:
+                print("[PLC信号] 未连接到 PLC，跳过检测")
+                self._plc_offline_logged = True
             return
-        status = read_word(self.plc, 0, log=False)
-        now = time.time()
+        self._plc_offline_logged = False
+        status, ts = self.plc_poller.latest
+        if ts == self.last_plc_ts:
+            return  # 轮询线程尚无新读数
         if status != self.last_plc_status:
             print(f"[PLC信号] 当前 DB4.DBW0 状态值为 {status}")
         self.last_plc_status = status
-        self.last_plc_ts = now
-        # 状态为1且无正在执行的识别时，启动子线程推理
-        if status == 1 and not self.infer_lock.locked():
-            print("[PLC触发] 状态为1，启动识别子线程")
-            threading.Thread(target=self.perform_inference, daemon=True).start()
+        self.last_plc_ts = ts
+        # 状态为1时投递给推理线程；已有待处理的触发则合并
+        if status == 1:
+            try:
+                self._infer_q.put_nowait(1)
+                print("[PLC触发] 状态为1，提交识别任务")
+            except queue.Full:
+                pass
+
+    def eventFilter(self, obj, event):
+        """视频标签尺寸变化（全屏切换、拖动分割条）时重新计算预览尺寸"""
+        if obj is self.video_label and event.type() == QEvent.Resize:
+            self._preview_key = None
+        return super().eventFilter(obj, event)
 
     def update_camera_frame(self):
         """实时刷新摄像头画面（不阻塞UI）"""
-        ret, frame = self.capture.read()
-        if not ret:
-            return
-        # 转换为Qt支持的图像格式并显示
-        qimg = QImage(frame.data, frame.shape[1], frame.shape[0], frame.shape[1] * 3, QImage.Format_BGR888)
-        pix = QPixmap.fromImage(qimg).scaled(self.video_label.size(), Qt.KeepAspectRatio)
-        self.video_label.setPixmap(pix)
+        frame = self.camera.get_latest()
+        if frame is None or frame is self._last_preview_frame:
+            return  # 尚无画面或没有新帧，跳过本次刷新
+        self._last_preview_frame = frame
+        self.show_preview(frame)
+
+    def show_preview(self, frame):
+        """先用 cv2 缩放到标签尺寸再转 QImage，避免 Qt 每帧按原分辨率缩放"""
+        frame_h, frame_w = frame.shape[:2]
+        if self._preview_key != (frame_w, frame_h):
+            area = self.video_label.contentsRect()
+            scale = min(area.width() / frame_w, area.height() / frame_h)
+            w, h = max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+            self._preview_buf = np.empty((h, w, 3), np.uint8)
+            self._preview_key = (frame_w, frame_h)
+        h, w = self._preview_buf.shape[:2]
+        cv2.resize(frame, (w, h), dst=self._preview_buf, interpolation=cv2.INTER_AREA)
+        # fromImage 会拷贝像素，缓冲可在下一帧安全复用
+        qimg = QImage(self._preview_buf.data, w, h, w * 3, QImage.Format_BGR888)
+        self.video_label.setPixmap(QPixmap.fromImage(qimg))
+
+    def _infer_worker(self):
+        """常驻推理线程：依次处理队列中的触发"""
+        while True:
+            self._infer_q.get()
+            try:
+                self.perform_inference()
+            except Exception as e:
+                print(f"[识别异常] {e}")
 
     def perform_inference(self):
-        """模型推理核心逻辑（子线程中执行）"""
-        with self.infer_lock:  # 加锁防止并发冲突
-            if not self.plc_connected:
-                print("[识别中止] PLC 已断开连接")
-                return
-
-            # 二次校验PLC信号（避免信号中断导致无效推理）
-            if self.last_plc_status == 1 and (time.time() - self.last_plc_ts) <= PLC_FAST_TRIGGER_WINDOW_SEC:
-                plc_status = 1
-            else:
+        """模型推理核心逻辑（推理线程中执行）"""
+        if not self.plc_connected:
+            print("[识别中止] PLC 已断开连接")
+            return
+
+        # 二次校验PLC信号（避免信号中断或排队中的旧触发导致无效推理；写回后缓存已是2）
+        status, ts = self.plc_poller.latest
+        if status == 1 and (time.time() - ts) <= PLC_FAST_TRIGGER_WINDOW_SEC:
+            plc_status = 1
+        else:
+            with self.plc_lock:
                 plc_status = read_word(self.plc, 0)
-            if plc_status != 1:
-                print("[识别中止] PLC 信号已变更，不再执行识别")
-                return
+        if plc_status != 1:
+            print("[识别中止] PLC 信号已变更，不再执行识别")
+            return
 
-            start_time = time.time()
-            # 读取摄像头帧用于推理
-            ret, frame = self.capture.read()
-            if not ret:
-                print("[识别失败] 摄像头读取画面失败")
+        start_time = time.time()
+        # 取采集线程的最新帧用于推理
+        frame = self.camera.get_latest(max_age=CAMERA_STALE_SEC)  # 过旧的帧视为采集失败，不拿上一件的画面识别
+        if frame is None:
+            print("[识别失败] 摄像头读取画面失败")
+            with self.plc_lock:
                 write_word(self.plc, 0, 2)  # 写入识别失败状态
-                return
-
-            # 模型推理（指定输入尺寸640，与训练一致）
-            img = frame
-            res = self.model([img], imgsz=640)[0]
-
-            # 解析推理结果（筛选置信度最高的目标）
-            best_cls, best_conf = None, 0
-            for box, conf, cls in zip(
-                    res.boxes.xyxy, res.boxes.conf.cpu().numpy(), res.boxes.cls.cpu().numpy().astype(int)
-            ):
-                # 绘制目标框
-                x1, y1, x2, y2 = map(int, box.cpu().numpy())
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-                # 绘制类别+置信度标签
-                if conf > 0.1:
-                    label = self.class_names.get(cls, str(cls))
-                    cv2.putText(frame, f'{label} {conf:.2f}', (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                    print(f"[目标检测] 类别：{label}，置信度：{conf:.2f}，位置：({x1},{y1})-({x2},{y2})")
-
-                # 更新置信度最高的目标
-                if conf > 0.1 and conf > best_conf:
-                    best_cls, best_conf = int(cls), conf
-
-            # 处理识别结果（含容错逻辑）
-            if best_cls is not None and best_cls in self.class_names:
-                # 有有效目标：更新统计并写入PLC
-                self.level_counts[best_cls] += 1
-                name = self.class_names[best_cls]
-                self.level_boxes[best_cls].setTitle(f'{name}: {self.level_counts[best_cls]}')
-                self.current_box.setTitle(f'当前类别: {name}')
-                print(f"[识别结果] 最优类别：{name}（ID:{best_cls}），写入PLC值 {best_cls+1}")
+                self.plc_poller.publish(2)
+            return
+
+        # 模型推理（输入尺寸与导出引擎一致）
+        res = self.run_model(frame)
+        frame = frame.copy()  # 在副本上标注，不改动采集线程共享的帧
+
+        # 解析推理结果：一次性拷回CPU，先按置信度过滤再绘制
+        # FP16 推理（如 TensorRT 导出失败回退 .pt 且 half=True）时结果为 float16，numba 不支持，统一转为 float32；
+        # xyxy/conf 是 boxes.data 的切片视图，转为 C 连续数组，与预热时编译的签名一致，避免首次触发时再编译
+        xyxy = np.ascontiguousarray(res.boxes.xyxy.float().cpu().numpy())
+        confs = np.ascontiguousarray(res.boxes.conf.float().cpu().numpy())
+        clses = res.boxes.cls.cpu().numpy().astype(np.int32)
+        best_idx, keep, boxes = pick_best_and_prepare(xyxy, confs, config.PREDICT_CONF)
+        log_lines = []
+        for (x1, y1, x2, y2), conf, cls in zip(boxes.tolist(), confs[keep], clses[keep].tolist()):
+            # 绘制目标框与类别+置信度标签
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            mask, text_h = self.label_mask(cls, conf)
+            self.blit_mask(frame, mask, x1 - 1, y1 - 10 - text_h - 1)
+            if DEBUG_LOG:
+                log_lines.append(f"[目标检测] 类别：{self.class_label(cls)}，置信度：{conf:.2f}，"
+                                 f"位置：({x1},{y1})-({x2},{y2})")
+        if log_lines:
+            sys.stdout.write('\n'.join(log_lines) + '\n')  # 循环结束后一次性输出
+
+        # 置信度最高的目标
+        best_cls = int(clses[best_idx]) if best_idx >= 0 else None
+
+        # 处理识别结果（含容错逻辑）
+        if best_cls is not None and best_cls < len(self.class_names):
+            # 有有效目标：写入PLC
+            is_default = False
+            name = self.class_names[best_cls]
+            print(f"[识别结果] 最优类别：{name}（ID:{best_cls}），写入PLC值 {best_cls+1}")
+            with self.plc_lock:
                 write_result(self.plc, best_cls + 1)
-            else:
-                # 无有效目标：默认归类为成品人参（工业场景适配）
-                self.level_counts[1] += 1
-                default_name = self.class_names[1]
-                self.level_boxes[1].setTitle(f'{default_name}: {self.level_counts[1]}')
-                self.current_box.setTitle(f'当前类别: {default_name}（默认）')
-                print(f"[识别结果] 无有效目标，默认归类为{default_name}，写入PLC值 2")
+                self.plc_poller.publish(2)
+        else:
+            # 无有效目标：默认归类为成品人参（工业场景适配）
+            best_cls, is_default = 1, True
+            default_name = self.class_names[1]
+            print(f"[识别结果] 无有效目标，默认归类为{default_name}，写入PLC值 2")
+            with self.plc_lock:
                 write_result(self.plc, 2)
-
-            # 更新PLC执行次数和状态
-            self.plc_count += 1
-            self.update_plc_status()
-
-            print("[PLC反馈] 识别完成，已写入状态值 2 与识别结果")
-
-            # 刷新带标注的画面
-            qimg = QImage(frame.data, frame.shape[1], frame.shape[0], frame.shape[1] * 3, QImage.Format_BGR888)
-            pix = QPixmap.fromImage(qimg).scaled(self.video_label.size(), Qt.KeepAspectRatio)
-            self.video_label.setPixmap(pix)
-
-            # 打印识别耗时
-            end_time = time.time()
-            print(f"[识别耗时] 本次识别总耗时：{int((end_time - start_time) * 1000)} 毫秒\n")
+                self.plc_poller.publish(2)
+
+        # 更新统计和PLC执行次数
+        self.level_counts[best_cls] += 1
+        self.plc_count += 1
+
+        print("[PLC反馈] 识别完成，已写入状态值 2 与识别结果")
+
+        # 界面刷新交给主线程，推理线程不等待重绘
+        self.class_updated.emit(best_cls, int(self.level_counts[best_cls]), is_default)
+        self.frame_ready.emit(frame)
+
+        # 打印识别耗时
+        end_time = time.time()
+        print(f"[识别耗时] 本次识别总耗时：{int((end_time - start_time) * 1000)} 毫秒\n")
+
+    def run_model(self, frame):
+        """单帧推理；帧尺寸与模型输入一致时写入预分配张量，跳过 Ultralytics 的 letterbox 与颜色转换"""
+        if frame.shape != self._rgb_buf.shape:
+            return self.model.predict(frame, **self._predict_args)[0]
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        self._infer_tensor[0].copy_(self._rgb_host.permute(2, 0, 1), non_blocking=True)
+        self._infer_tensor.div_(255)
+        return self.model.predict(self._infer_tensor, **self._predict_args)[0]
+
+    def class_label(self, cls):
+        """类别ID → 名称（元组下标访问，未知ID原样显示）"""
+        names = self.class_names
+        return names[cls] if 0 <= cls < len(names) else str(cls)
+
+    def label_mask(self, cls, conf):
+        """标签文字位图按（类别, 两位小数置信度）缓存，避免每个框重复光栅化字体"""
+        key = (cls, round(float(conf) * 100))
+        cached = self._label_cache.get(key)
+        if cached is None:
+            text = f'{self.class_label(cls)} {key[1] / 100:.2f}'
+            (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+            canvas = np.zeros((h + baseline + 2, w + 2), np.uint8)  # 四周留1像素给笔画描边
+            cv2.putText(canvas, text, (1, h + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 255, 2)
+            cached = self._label_cache[key] = (canvas > 0, h)
+        return cached
+
+    @staticmethod
+    def blit_mask(frame, mask, x, y, color=(0, 255, 0)):
+        """以 (x, y) 为左上角把掩码以纯色贴到画面上，超出画面的部分裁掉"""
+        frame_h, frame_w = frame.shape[:2]
+        mask_h, mask_w = mask.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + mask_w, frame_w), min(y + mask_h, frame_h)
+        if x0 < x1 and y0 < y1:
+            frame[y0:y1, x0:x1][mask[y0 - y:y1 - y, x0 - x:x1 - x]] = color
 
     # ================= 资源释放 =================
     def closeEvent(self, event):
         """窗口关闭时释放资源"""
         self.plc_timer.stop()
         self.video_timer.stop()
+        self.camera.stop()
         self.capture.release()
+        self.plc_poller.stop()
         plc_con_close(self.plc)
         print("[程序退出] 所有资源已释放")
         event.accept()
 
 # ================= 程序入口 =================
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')  # src.runtime 的模型导出日志输出到控制台
     app = QApplication(sys.argv)
     # 核心配置（已修改为你的实际路径和PLC IP）
     GUI = GinsengClassifierGUI(
@@ -0,0 +1,80 @@
+"""Dynamic batching for /detect: coalesce frames arriving within a few ms into one forward pass.
+
+多相机产线上几路画面常在同一时刻触发；请求线程只把图像放入队列并等待 Future，
+单个后台线程在窗口期内凑批后一次推理，固定开销按批摊薄。
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .model import Detections, ModelManager
+
+logger = logging.getLogger("rs.batch")
+
+
+class DynamicBatcher:
+    def __init__(self, model_manager: ModelManager, max_batch: int, window_sec: float):
+        self.model_manager = model_manager
+        self.max_batch = max(1, max_batch)
+        self.window_sec = window_sec
+        self._queue: "queue.Queue[Tuple[np.ndarray, str, Future]]" = queue.Queue()
+        # 推理在真实 OS 线程中进行，不依赖 WSGI worker 的并发模型
+        self._thread = threading.Thread(target=self._run, name="dynamic-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image: np.ndarray, model_name: str, timeout: float) -> Detections:
+        """Queue one frame and wait for its detections.
+
+        超时且尚未开始推理时撤销该请求并抛出 TimeoutError，由调用方自行推理；
+        已在推理中的则等待其完成。模型先在调用线程中加载，冷启动/导出不计入超时。
+        """
+        self.model_manager.get(model_name)
+        future: Future = Future()
+        self._queue.put((image, model_name, future))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _collect(self) -> List[Tuple[np.ndarray, str, Future]]:
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.window_sec
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        while True:
+            items = self._collect()
+            # 同一批内可能混有不同模型的请求，按模型分组各推理一次
+            groups: Dict[str, List[Tuple[np.ndarray, Future]]] = {}
+            for image, model_name, future in items:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(model_name, []).append((image, future))
+            for model_name, group in groups.items():
+                start = time.perf_counter()
+                try:
+                    results = self.model_manager.predict_batch([image for image, _ in group], model_name)
+                except Exception as exc:
+                    for _, future in group:
+                        future.set_exception(exc)
+                    continue
+                for (_, future), detections in zip(group, results):
+                    future.set_result(detections)
+                logger.info(
+                    "[批推理] %s batch=%d 用时 %.1fms", model_name, len(group), (time.perf_counter() - start) * 1000
+                )
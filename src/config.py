@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Dict, List
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 APP_ROOT = BASE_DIR
@@ -9,6 +10,37 @@ STATIC_DIR = APP_ROOT / "images"
 
 DEFAULT_MODEL = os.getenv("YOLO_MODEL", "yolo_rs.pt")
 CONF_THRESHOLD = float(os.getenv("YOLO_CONF", "0.1"))
+# 送入 NMS 的置信度下限，默认与 Ultralytics 未传 conf 时一致（0.25）；
+# 实际生效阈值为 max(YOLO_CONF, YOLO_NMS_CONF)，保持与旧版相同的分类结果
+NMS_CONF = float(os.getenv("YOLO_NMS_CONF", "0.25"))
+PREDICT_CONF = max(CONF_THRESHOLD, NMS_CONF)
+IMG_SIZE = int(os.getenv("YOLO_IMGSZ", "640"))
+IOU_THRESHOLD = float(os.getenv("YOLO_IOU", "0.45"))
+# 仅桌面端使用（只取置信度最高的目标）；Web 端 /detect 需要完整计数，保持 Ultralytics 默认上限
+MAX_DET = int(os.getenv("YOLO_MAX_DET", "10"))
+# /detect 结果缓存条数（按模型名 + 图像字节哈希），0 关闭
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "512"))
+
+# 上传限制：请求体上限（MB）与解码前按图像头部拒绝的最大像素数，防止超大图占满 worker
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "8")) * 1024 * 1024)
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "25000000"))
+
+# Web 日志额外写入的滚动文件，留空仅输出到终端
+LOG_FILE = os.getenv("RS_LOG_FILE", "")
+
+# 启动时在后台加载并预热 model/ 下全部模型；开发调试可设 RS_WARMUP=0 改为首次请求时加载
+WARMUP_MODELS = os.getenv("RS_WARMUP", "1") == "1"
+
+# 动态批推理：并发的 /detect 在窗口期内凑批一次前向（仅 .pt 运行时真正成批），默认关闭
+DYNAMIC_BATCH = os.getenv("DYNAMIC_BATCH", "0") == "1"
+DYNAMIC_BATCH_SIZE = int(os.getenv("DYNAMIC_BATCH_SIZE", "4"))
+DYNAMIC_BATCH_WINDOW_MS = float(os.getenv("DYNAMIC_BATCH_WINDOW_MS", "10"))
+DYNAMIC_BATCH_TIMEOUT_SEC = float(os.getenv("DYNAMIC_BATCH_TIMEOUT", "2.0"))
+
+# Inference runtime: auto (TensorRT on CUDA, otherwise OpenVINO), engine, openvino, pt
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "auto").lower()
+# Calibration dataset yaml for OpenVINO INT8; empty keeps FP32 IR
+YOLO_INT8_DATA = os.getenv("YOLO_INT8_DATA", "")
 
 # PLC settings (DB4: DBW0 trigger, DBW2 result)
 PLC_IP = os.getenv("PLC_IP", "192.168.1.10")
@@ -16,6 +48,8 @@ PLC_DB = int(os.getenv("PLC_DB", "4"))
 PLC_RACK = int(os.getenv("PLC_RACK", "0"))
 PLC_SLOT = int(os.getenv("PLC_SLOT", "1"))
 PLC_CONN_TYPE = int(os.getenv("PLC_CONN_TYPE", "2"))
+# 后台保活/重连间隔（毫秒），0 关闭，仅在请求中按需建连
+PLC_HEARTBEAT_MS = int(os.getenv("PLC_HEARTBEAT_MS", "500"))
 
 FALLBACK_NAMES = ["病斑", "成品", "带泥", "分叉", "磕疤", "烂头", "锈", "芽孢"]
 FALLBACK_COLORS = [
@@ -38,3 +72,12 @@ NAME_TRANSLATIONS = {
     "xiu": "锈",
     "yabao": "芽孢",
 }
+
+
+def translate_names(names: Dict[int, str]) -> List[str]:
+    """Class names ordered by YOLO id, translated via NAME_TRANSLATIONS; FALLBACK_NAMES when empty.
+
+    Web 端（src.model）与桌面端（main_pro2.py）共用这一规则。
+    """
+    translated = [NAME_TRANSLATIONS.get(names[i], names[i]) for i in sorted(names)]
+    return translated or list(FALLBACK_NAMES)
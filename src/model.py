@@ -1,16 +1,27 @@
+import logging
 import random
+import threading
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 from PIL import Image
 
 from . import config
+from .runtime import cuda_available, export_runtime
 
 try:
     from ultralytics import YOLO  # type: ignore
 except Exception:  # pragma: no cover
     YOLO = None
 
+logger = logging.getLogger("rs.model")
+
+WARMUP_RUNS = 3
+AVAILABLE_TTL_SEC = 5.0
+
 
 @dataclass
 class Detection:
@@ -20,13 +31,35 @@ class Detection:
     box: List[float]  # [x1, y1, x2, y2]
 
 
+@dataclass
+class Detections:
+    """All detections of one image as parallel arrays (struct-of-arrays)."""
+
+    cls_ids: np.ndarray  # int32[N], 1-based
+    confs: np.ndarray  # float32[N]
+    boxes: np.ndarray  # float32[N, 4], [x1, y1, x2, y2]
+    cls_names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.cls_ids)
+
+    @classmethod
+    def from_list(cls, detections: List[Detection]) -> "Detections":
+        return cls(
+            cls_ids=np.array([d.cls_id for d in detections], dtype=np.int32),
+            confs=np.array([d.conf for d in detections], dtype=np.float32),
+            boxes=np.array([d.box for d in detections], dtype=np.float32).reshape(-1, 4),
+            cls_names=[d.cls_name for d in detections],
+        )
+
+
 def load_class_meta() -> List[Dict]:
     names_list: List[str] = []
     if YOLO is not None and (config.MODEL_DIR / config.DEFAULT_MODEL).exists():
         try:
             yolo = YOLO(config.MODEL_DIR / config.DEFAULT_MODEL)
             names = yolo.model.names if hasattr(yolo, "model") else getattr(yolo, "names", {})
-            names_list = [config.NAME_TRANSLATIONS.get(names[i], names[i]) for i in sorted(names)]  # type: ignore[index]
+            names_list = config.translate_names(names)  # type: ignore[arg-type]
         except Exception:
             names_list = []
     if not names_list:
@@ -38,6 +71,7 @@ def load_class_meta() -> List[Dict]:
 
 
 CLASS_META = load_class_meta()
+_CLASS_NAME_BY_ID = {c["id"]: c["name"] for c in CLASS_META}
 
 
 class ModelManager:
@@ -47,44 +81,110 @@ class ModelManager:
         self.model_dir = model_dir
         self.model_dir.mkdir(parents=True, exist_ok=True)
         self.cache: Dict[str, Optional["YOLO"]] = {}
+        # 仅 .pt 运行时支持多图一批；导出的 TensorRT/OpenVINO 按 batch=1 特化
+        self.batchable: Dict[str, bool] = {}
+        # Ultralytics 的 predictor 非线程安全：同一模型的推理串行，不同模型可并行
+        self.predict_locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+        self._available: Optional[List[str]] = None
+        self._available_ts = 0.0
+        # conf/iou 交给模型自带的 NMS 处理（max_det 保持默认，counts/total 需要全部目标）；FP16 仅在 CUDA 上启用
+        cuda = cuda_available()
+        self.predict_args = {
+            "imgsz": config.IMG_SIZE,
+            "conf": config.PREDICT_CONF,
+            "iou": config.IOU_THRESHOLD,
+            "half": cuda,
+            "verbose": False,
+        }
+        if cuda:
+            self.predict_args["device"] = 0
 
     def available(self) -> List[str]:
-        return sorted([p.name for p in self.model_dir.glob("*.pt")])
+        # 目录扫描结果缓存几秒，页面与 /detect 每次请求不再重复 glob
+        now = time.monotonic()
+        if self._available is None or now - self._available_ts > AVAILABLE_TTL_SEC:
+            self._available = sorted([p.name for p in self.model_dir.glob("*.pt")])
+            self._available_ts = now
+        return self._available
+
+    def reload_available(self) -> List[str]:
+        self._available = None
+        return self.available()
 
     def get(self, name: str) -> Optional["YOLO"]:
+        """Return the loaded model, or None only when ultralytics or the weights file is missing.
+
+        权重存在但加载失败时抛出异常（不缓存，下次重试），绝不退回随机的模拟结果。
+        """
         if name in self.cache:
             return self.cache[name]
-        model_path = self.model_dir / name
-        if YOLO is None or not model_path.exists():
-            self.cache[name] = None
-            return None
-        try:
-            self.cache[name] = YOLO(model_path)
-        except Exception:
-            self.cache[name] = None
-        return self.cache[name]
-
-    def predict(self, image: Image.Image, model_name: str) -> List[Detection]:
+        # 加载+预热期间持锁，并发请求等待模型就绪而不是重复加载
+        with self.lock:
+            if name in self.cache:
+                return self.cache[name]
+            model_path = self.model_dir / name
+            if YOLO is None or not model_path.exists():
+                self.cache[name] = None
+                return None
+            runtime = export_runtime(model_path)
+            try:
+                model = YOLO(runtime, task="detect")
+            except Exception as exc:
+                logger.exception("[模型] 加载 %s 失败", runtime)
+                raise RuntimeError(f"模型加载失败 {name}: {exc}") from exc
+            # 预热失败不影响已加载的模型，只是首次推理仍需承担冷启动
+            try:
+                self._warmup(model)
+            except Exception:
+                logger.exception("[模型] %s 预热失败，继续使用已加载的模型", name)
+            self.batchable[name] = Path(runtime).suffix == ".pt"
+            self.predict_locks[name] = threading.Lock()
+            self.cache[name] = model
+            return model
+
+    def predict(self, image: Union[np.ndarray, Image.Image], model_name: str) -> Detections:
+        """``image`` may be a PIL image (RGB) or an HxWx3 uint8 array in BGR order, as Ultralytics expects."""
         model = self.get(model_name)
         if model is None:
-            return self._mock_predict(image)
-        results = model([image], imgsz=640, verbose=False)
-        result = results[0]
-        detections: List[Detection] = []
-        names = getattr(model, "names", {}) or {}
-        for box in result.boxes:
-            cls_idx = int(box.cls[0])
-            cls_id = cls_idx + 1
-            cls_name = self._class_name(cls_id, names.get(cls_idx, str(cls_idx)))
-            conf = float(box.conf[0])
-            if conf < config.CONF_THRESHOLD:
-                continue
-            x1, y1, x2, y2 = [float(v) for v in box.xyxy[0].tolist()]
-            detections.append(Detection(cls_id=cls_id, cls_name=cls_name, conf=conf, box=[x1, y1, x2, y2]))
-        return detections
+            return Detections.from_list(self._mock_predict(image))
+        with self.predict_locks[model_name]:
+            result = model.predict(image, **self.predict_args)[0]
+        return self._to_detections(result, getattr(model, "names", {}) or {})
 
-    def _mock_predict(self, image: Image.Image) -> List[Detection]:
-        width, height = image.size
+    def predict_batch(self, images: List[Union[np.ndarray, Image.Image]], model_name: str) -> List[Detections]:
+        """Run several images through one forward pass when the loaded runtime allows it."""
+        model = self.get(model_name)
+        if model is None or len(images) == 1 or not self.batchable.get(model_name):
+            return [self.predict(image, model_name) for image in images]
+        with self.predict_locks[model_name]:
+            results = model.predict(images, **self.predict_args)
+        names = getattr(model, "names", {}) or {}
+        return [self._to_detections(result, names) for result in results]
+
+    def _to_detections(self, result, names: Dict[int, str]) -> Detections:
+        # 整批拷回 CPU，避免逐框同步
+        boxes = result.boxes
+        cls_idx = boxes.cls.cpu().numpy().astype(np.int32)
+        return Detections(
+            cls_ids=cls_idx + 1,
+            confs=boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+            boxes=boxes.xyxy.cpu().numpy().astype(np.float32, copy=False),
+            cls_names=[self._class_name(i + 1, names.get(i, str(i))) for i in cls_idx.tolist()],
+        )
+
+    def _warmup(self, model: "YOLO") -> None:
+        """Run dummy inferences so CUDA init / kernel compilation is not paid by the first trigger."""
+        # 与 /detect 相同的 ndarray 输入，预处理路径也一并预热
+        dummy = np.zeros((config.IMG_SIZE, config.IMG_SIZE, 3), dtype=np.uint8)
+        for _ in range(WARMUP_RUNS):
+            model.predict(dummy, **self.predict_args)
+
+    def _mock_predict(self, image: Union[np.ndarray, Image.Image]) -> List[Detection]:
+        if isinstance(image, np.ndarray):
+            height, width = image.shape[:2]
+        else:
+            width, height = image.size
         detections: List[Detection] = []
         for _ in range(random.randint(2, 4)):
             meta = random.choice(CLASS_META)
@@ -104,5 +204,4 @@ class ModelManager:
 
     @staticmethod
     def _class_name(cls_id: int, default: str) -> str:
-        meta = next((c for c in CLASS_META if c["id"] == cls_id), None)
-        return meta["name"] if meta else default
+        return _CLASS_NAME_BY_ID.get(cls_id, default)
@@ -1,3 +1,4 @@
+import struct
 import threading
 import time
 from typing import Dict, Optional
@@ -11,6 +12,12 @@ except Exception:  # pragma: no cover
 
 RETRY_DELAY_SEC = 0.02
 FAST_TRIGGER_WINDOW_SEC = 0.1
+TRIGGER_CACHE_SEC = 0.02
+RECONNECT_INTERVAL_SEC = 2.0
+
+# DBW 为大端有符号 16 位整数；预编译格式，轮询热路径不再逐次解析参数
+_S16 = struct.Struct(">h")
+_S16X2 = struct.Struct(">hh")
 
 
 class PLCManager:
@@ -28,6 +35,8 @@ class PLCManager:
         self.last_trigger: Optional[int] = None
         self.last_trigger_ts = 0.0
         self.last_result: Optional[int] = None
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
 
     def connect(self) -> bool:
         if snap7 is None:
@@ -38,6 +47,15 @@ class PLCManager:
         if self.connected and self.client:
             return True
         with self.lock:
+            # 持锁后再查一次：后台保活与 /plc/start 可能同时重连，后到者不得顶掉刚建好的会话
+            if self.connected and self.client:
+                return True
+            # 释放已失效的旧会话，避免占用 PLC 有限的连接数
+            if self.client is not None:
+                try:
+                    self.client.disconnect()
+                except Exception:
+                    pass
             self.client = snap7.client.Client()
             self.client.set_connection_type(self.conn_type)
             try:
@@ -56,10 +74,51 @@ class PLCManager:
                 self.client.disconnect()
             self.connected = False
 
+    def start_heartbeat(self, interval_sec: float) -> None:
+        """后台保活：定期读 DBW0 探测链路，掉线后自动重连，请求路径上不再承担建连耗时。"""
+        if snap7 is None or interval_sec <= 0:
+            return
+        thread = self._heartbeat_thread
+        if thread is not None and thread.is_alive():
+            if not self._heartbeat_stop.is_set():
+                return
+            # 上一个循环正在退出：等它结束再启动，保证同一时刻只有一个保活线程
+            thread.join()
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, args=(interval_sec,), name="plc-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self, timeout: float = 2.0) -> None:
+        thread = self._heartbeat_thread
+        if thread is None:
+            return
+        self._heartbeat_stop.set()
+        thread.join(timeout)
+        # 线程仍卡在建连超时中时保留引用，start_heartbeat 不会再起第二个循环
+        if not thread.is_alive():
+            self._heartbeat_thread = None
+
+    def _heartbeat(self, interval_sec: float) -> None:
+        next_connect = 0.0
+        while not self._heartbeat_stop.is_set():
+            if self.connected:
+                # 最近刚有请求读过 DBW0 就不必再探测；读失败会把 connected 置 False
+                if time.time() - self.last_trigger_ts >= interval_sec:
+                    self.read_word(0)
+            elif time.monotonic() >= next_connect:
+                # 离线时按间隔重连，避免 PLC 不在线时持续占用连接超时
+                if not self.connect():
+                    next_connect = time.monotonic() + RECONNECT_INTERVAL_SEC
+            self._heartbeat_stop.wait(interval_sec)
+
     def ensure_connected(self) -> bool:
-        """保证连接可用；断开时自动重连一次。"""
+        """保证连接可用；断开时自动重连一次（后台保活运行时由其负责重连，这里只读状态）。"""
         if self.connected and self.client:
             return True
+        if self._heartbeat_thread is not None and not self._heartbeat_stop.is_set():
+            return False
         return self.connect()
 
     def read_word(self, offset: int) -> Optional[int]:
@@ -68,7 +127,7 @@ class PLCManager:
                 return None
             try:
                 data = self.client.db_read(self.db, offset, 2)
-                value = int.from_bytes(data, byteorder="big", signed=True)
+                (value,) = _S16.unpack_from(data)
                 if offset == 0:
                     self.last_trigger = value
                     self.last_trigger_ts = time.time()
@@ -86,7 +145,7 @@ class PLCManager:
                 if not (self.client and self.connected):
                     return False
                 try:
-                    self.client.db_write(self.db, offset, value.to_bytes(2, byteorder="big", signed=True))
+                    self.client.db_write(self.db, offset, _S16.pack(value))
                     return True
                 except Exception as exc:
                     self.last_error = f"write DB{self.db}.DBW{offset} failed: {exc}"
@@ -99,12 +158,12 @@ class PLCManager:
         """Single PLC round trip: DBW0=2 (done), DBW2=cls_id.
 
         Keep the write path单次往返，避免额外确认读阻塞（默认关闭确认以减小延迟）。
+        S7 的一个 PDU 不能同时携带读和写，snap7 每个 client 也只允许一个异步任务，
+        因此确认只能是紧随其后的一次 4 字节读（DBW0+DBW2 一起读），无法与写合并。
         """
         status_val = max(-32768, min(32767, 2))
         cls_val = max(-32768, min(32767, int(cls_id)))
-        payload = status_val.to_bytes(2, byteorder="big", signed=True) + cls_val.to_bytes(
-            2, byteorder="big", signed=True
-        )
+        payload = _S16X2.pack(status_val, cls_val)
         for _ in range(max_retries):
             with self.lock:
                 if not (self.client and self.connected):
@@ -114,6 +173,9 @@ class PLCManager:
                     self.client.db_write(self.db, 0, payload)
                     self.exec_count += 1
                     self.last_result = cls_val
+                    # 写入成功即知 DBW0=2，更新缓存的触发值，后续状态查询/快速触发判断不会拿到旧的 1
+                    self.last_trigger = status_val
+                    self.last_trigger_ts = time.time()
                     # 可选的单次轻量确认，不重试，避免增加等待
                     if confirm:
                         self._confirm_result(status_val, cls_val, retries=0)
@@ -135,8 +197,7 @@ class PLCManager:
                 self.connected = False
                 return False
 
-            status = int.from_bytes(data[:2], byteorder="big", signed=True)
-            result = int.from_bytes(data[2:], byteorder="big", signed=True)
+            status, result = _S16X2.unpack_from(data)
             if status == status_val and result == cls_val:
                 self.last_trigger = status
                 self.last_trigger_ts = time.time()
@@ -148,7 +209,11 @@ class PLCManager:
 
     def status(self, refresh_trigger: bool = True) -> Dict:
         if self.connected:
-            trigger = self.read_word(0) if refresh_trigger else self.last_trigger
+            # 多个页面/轮询同时请求时，刚读过的 DBW0 直接复用，避免重复占用 S7 链路
+            if refresh_trigger and time.time() - self.last_trigger_ts >= TRIGGER_CACHE_SEC:
+                trigger = self.read_word(0)
+            else:
+                trigger = self.last_trigger
         else:
             trigger = None
         return {
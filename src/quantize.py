@@ -0,0 +1,52 @@
+"""One-off OpenVINO INT8 post-training quantization using captured camera frames.
+
+Usage: python -m src.quantize <frames_dir> [--model yolo_rs.pt] [--fraction 1.0]
+
+frames_dir 中放 100~300 张正常生产时保存的相机画面（无需标注）。量化结果
+`<stem>_int8_openvino_model/` 写在权重旁边，OpenVINO 后端加载时会优先使用。
+"""
+import argparse
+from pathlib import Path
+
+from . import config
+from .model import YOLO
+
+
+def write_calib_yaml(frames_dir: Path, names: dict) -> Path:
+    """Write an Ultralytics dataset yaml whose val split is the frame folder."""
+    import yaml  # type: ignore  # ultralytics 依赖
+
+    data = {"path": str(frames_dir.resolve()), "train": ".", "val": ".", "names": dict(names)}
+    yaml_path = frames_dir / "calib.yaml"
+    yaml_path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+    return yaml_path
+
+
+def quantize(frames_dir: Path, model_name: str = config.DEFAULT_MODEL, fraction: float = 1.0) -> Path:
+    if YOLO is None:
+        raise RuntimeError("ultralytics 未安装")
+    model_path = config.MODEL_DIR / model_name
+    if not model_path.exists():
+        raise FileNotFoundError(model_path)
+    frames = [p for p in frames_dir.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp")]
+    if not frames:
+        raise ValueError(f"{frames_dir} 中没有校准图片")
+    model = YOLO(model_path)
+    data = write_calib_yaml(frames_dir, model.names)
+    exported = model.export(
+        format="openvino", int8=True, data=str(data), fraction=fraction, imgsz=config.IMG_SIZE
+    )
+    return Path(exported)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenVINO INT8 post-training quantization")
+    parser.add_argument("frames_dir", type=Path, help="directory of representative camera frames")
+    parser.add_argument("--model", default=config.DEFAULT_MODEL, help="weights file under model/")
+    parser.add_argument("--fraction", type=float, default=1.0, help="fraction of frames used for calibration")
+    args = parser.parse_args()
+    print(f"[INT8] 量化完成：{quantize(args.frames_dir, args.model, args.fraction)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Inference runtime selection and one-off export of .pt weights to TensorRT/OpenVINO.
+
+Web 端（src.model）与桌面端（main_pro2.py）共用；本模块导入时不加载任何模型。
+"""
+import logging
+from pathlib import Path
+
+from . import config
+
+try:
+    from ultralytics import YOLO  # type: ignore
+except Exception:  # pragma: no cover
+    YOLO = None
+
+logger = logging.getLogger("rs.runtime")
+
+
+def cuda_available() -> bool:
+    try:
+        import torch  # type: ignore
+
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+def select_backend() -> str:
+    if config.YOLO_BACKEND != "auto":
+        return config.YOLO_BACKEND
+    return "engine" if cuda_available() else "openvino"
+
+
+def _is_fresh(artifact: Path, weights: Path) -> bool:
+    return artifact.exists() and artifact.stat().st_mtime >= weights.stat().st_mtime
+
+
+def _failure_marker(target: Path) -> Path:
+    return target.with_name(f"{target.name}.export_failed")
+
+
+def export_runtime(model_path: Path) -> Path:
+    """Export .pt weights to TensorRT/OpenVINO once and return the cached artifact.
+
+    导出产物与权重放在同一目录；.pt 更新后自动重新导出，导出失败时回退原始 .pt。
+    """
+    if YOLO is None or model_path.suffix != ".pt":
+        return model_path
+    backend = select_backend()
+    if backend == "engine":
+        target = model_path.with_suffix(".engine")
+        export_args = {"format": "engine", "half": True}
+    elif backend == "openvino":
+        int8_target = model_path.parent / f"{model_path.stem}_int8_openvino_model"
+        # 已有 INT8 量化模型（python -m src.quantize 生成）时优先使用
+        if _is_fresh(int8_target, model_path):
+            return int8_target
+        int8 = bool(config.YOLO_INT8_DATA)
+        target = int8_target if int8 else model_path.parent / f"{model_path.stem}_openvino_model"
+        export_args = {"format": "openvino", "int8": int8}
+        if int8:
+            export_args["data"] = config.YOLO_INT8_DATA
+    else:
+        return model_path
+    if _is_fresh(target, model_path):
+        return target
+    # 同一份权重导出失败过（如有 CUDA 无 TensorRT、离线无法自动安装依赖）则直接用 .pt，
+    # 不再每次启动/加载都重试；权重更新或删除该标记文件后会重新尝试
+    marker = _failure_marker(target)
+    if _is_fresh(marker, model_path):
+        logger.info("[模型导出] %s 此前导出 %s 失败（见 %s），直接使用原始权重", model_path.name, backend, marker.name)
+        return model_path
+    try:
+        logger.info("[模型导出] 正在将 %s 导出为 %s 格式，首次运行耗时较长", model_path.name, backend)
+        # imgsz 固定，导出的引擎按 640 输入形状特化
+        return Path(YOLO(model_path).export(imgsz=config.IMG_SIZE, **export_args))
+    except Exception as exc:
+        logger.warning("[模型导出] %s 导出失败，回退 %s: %s", backend, model_path.name, exc)
+        try:
+            marker.write_text(f"{exc}\n", encoding="utf-8")
+        except OSError:
+            pass
+        return model_path
@@ -1,26 +1,109 @@
 import base64
+import hashlib
 import io
+import logging
+import logging.handlers
+import queue
+import threading
 import time
-from typing import Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, render_template, request
+import numpy as np
+from flask import Flask, Response, jsonify, render_template, request
 from PIL import Image
 
 from . import config
-from .model import ModelManager, Detection, CLASS_META
+from .batching import DynamicBatcher
+from .model import ModelManager, Detections, CLASS_META
 from .plc import PLCManager
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+try:
+    from turbojpeg import TurboJPEG  # type: ignore
+
+    _TJ = TurboJPEG()
+except Exception:  # pragma: no cover
+    _TJ = None
+
+def _setup_logger() -> logging.Logger:
+    # 请求线程只把日志记录放入队列，由后台监听线程写终端/文件，推理路径上不做 I/O。
+    # 队列挂在 "rs" 上，src.model / src.runtime / src.batching 的日志同样经由队列输出
+    log = logging.getLogger("rs")
+    if log.handlers:
+        return logging.getLogger("rs.web")
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers: List[logging.Handler] = [console]
+    if config.LOG_FILE:
+        rotating = logging.handlers.RotatingFileHandler(
+            config.LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
+        )
+        rotating.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        handlers.append(rotating)
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    logging.handlers.QueueListener(log_queue, *handlers).start()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    return logging.getLogger("rs.web")
+
+
+logger = _setup_logger()
+
 app = Flask(
     __name__,
     template_folder=str(config.TEMPLATE_DIR),
     static_folder=str(config.STATIC_DIR),
     static_url_path="/images",
 )
+# 超限的请求体由 Werkzeug 在读取前直接以 413 拒绝
+app.config["MAX_CONTENT_LENGTH"] = config.MAX_UPLOAD_BYTES
+Image.MAX_IMAGE_PIXELS = config.MAX_IMAGE_PIXELS
 
 model_manager = ModelManager(config.MODEL_DIR)
+_batcher = (
+    DynamicBatcher(model_manager, config.DYNAMIC_BATCH_SIZE, config.DYNAMIC_BATCH_WINDOW_MS / 1000.0)
+    if config.DYNAMIC_BATCH
+    else None
+)
 plc_manager = PLCManager()
-_LAST_PLC_LOG = {"connected": None, "trigger": None, "ts": 0.0}
+_LAST_PLC_LOG = {"state": None, "ts": 0.0}
 _FALLBACK_MODEL_NAME = config.DEFAULT_MODEL or "yolo_rs.pt"
+# 计数数组长度：类别 ID 为 1-based，另需容纳默认归类的成品 ID=2
+_COUNT_SLOTS = max(len(CLASS_META) + 1, 3)
+# LRU: (model, image digest) -> (image size, detections)
+_PREDICT_CACHE: "OrderedDict[Tuple[str, bytes], Tuple[Tuple[int, int], Detections]]" = OrderedDict()
+_PREDICT_CACHE_LOCK = threading.Lock()
+
+
+def _preload_models() -> None:
+    # 后台加载并预热全部模型（默认模型优先），首个 PLC 触发或切换模型时无需承担冷启动耗时
+    if not config.WARMUP_MODELS:
+        return
+    model_ctx = _resolve_models()
+    if model_ctx["using_placeholder"]:
+        return
+    default_model = model_ctx["default_model"]
+    names = [default_model] + [m for m in model_ctx["models"] if m != default_model]
+
+    def _run() -> None:
+        start = time.perf_counter()
+        loaded = 0
+        for name in names:
+            try:
+                loaded += model_manager.get(name) is not None
+            except Exception:
+                pass  # 失败原因已由 ModelManager 记录，首次请求时会重试
+        logger.info("[模型] 预热完成 %d/%d 个模型，用时 %.2fs", loaded, len(names), time.perf_counter() - start)
+
+    threading.Thread(target=_run, daemon=True).start()
 
 
 def _resolve_models() -> Dict[str, object]:
@@ -36,31 +119,85 @@ def _resolve_models() -> Dict[str, object]:
     return {"models": models, "default_model": default_model, "using_placeholder": using_placeholder}
 
 
-@app.route("/", methods=["GET"])
-def home():
-    model_ctx = _resolve_models()
+_BACKGROUND_STARTED = False
+_BACKGROUND_LOCK = threading.Lock()
+
+
+def start_background_tasks() -> None:
+    """Start background model warm-up and the PLC heartbeat once per serving process.
+
+    不在导入时启动：debug 模式下 Werkzeug 重载器会在监视进程与服务进程中各导入一次本模块，
+    导入即启动会让两个进程都导出/加载全部模型、各自占用一个 S7 连接并持续轮询。gunicorn 在 post_worker_init 中调用，
+    开发模式下由首个请求（通常是打开页面）触发。
+    """
+    global _BACKGROUND_STARTED
+    with _BACKGROUND_LOCK:
+        if _BACKGROUND_STARTED:
+            return
+        _BACKGROUND_STARTED = True
+    _preload_models()
+    plc_manager.start_heartbeat(config.PLC_HEARTBEAT_MS / 1000.0)
+
+
+@app.before_request
+def _ensure_background_tasks() -> None:
+    if not _BACKGROUND_STARTED:
+        start_background_tasks()
+
+
+# 页面只随模型列表变化：按 (模型列表, 默认模型, 是否占位) 缓存渲染结果，/models/reload 时清空
+_PAGE_CACHE_CONTROL = "public, max-age=5, stale-while-revalidate=30"
+
+
+@lru_cache(maxsize=8)
+def _render_home(models: Tuple[str, ...], default_model: str, using_placeholder: bool) -> str:
     return render_template(
         "home.html",
-        **model_ctx,
+        models=list(models),
+        default_model=default_model,
+        using_placeholder=using_placeholder,
     )
 
 
-@app.route("/app", methods=["GET"])
-def index():
-    model_ctx = _resolve_models()
+@lru_cache(maxsize=8)
+def _render_index(models: Tuple[str, ...], default_model: str, using_placeholder: bool) -> str:
     return render_template(
         "index.html",
-        models=model_ctx["models"],
+        models=list(models),
         classes=CLASS_META,
-        default_model=model_ctx["default_model"],
-        using_placeholder=model_ctx["using_placeholder"],
+        default_model=default_model,
+        using_placeholder=using_placeholder,
     )
 
 
+def _page(render) -> Response:
+    model_ctx = _resolve_models()
+    html = render(tuple(model_ctx["models"]), model_ctx["default_model"], model_ctx["using_placeholder"])
+    resp = Response(html, mimetype="text/html")
+    resp.headers["Cache-Control"] = _PAGE_CACHE_CONTROL
+    return resp
+
+
+@app.route("/", methods=["GET"])
+def home():
+    return _page(_render_home)
+
+
+@app.route("/app", methods=["GET"])
+def index():
+    return _page(_render_index)
+
+
+@app.errorhandler(413)
+def payload_too_large(_exc):
+    return _json({"error": f"上传过大（上限 {config.MAX_UPLOAD_BYTES // (1024 * 1024)}MB）"}, 413)
+
+
 @app.route("/plc/start", methods=["POST"])
 def plc_start():
-    ok = plc_manager.ensure_connected()
-    return jsonify({"connected": ok, **plc_manager.status()})
+    # 手动启动时总是立即建连，不等后台保活的重连间隔
+    ok = plc_manager.connect()
+    return _json({"connected": ok, **plc_manager.status()})
 
 
 @app.route("/plc/status", methods=["GET"])
@@ -70,27 +207,41 @@ def plc_status():
     status = plc_manager.status()
     connected = status.get("connected")
     trig = status.get("trigger")
-    now = time.time()
-    should_log = (
-        connected != _LAST_PLC_LOG["connected"]
-        or trig != _LAST_PLC_LOG["trigger"]
-        or (now - _LAST_PLC_LOG["ts"] > 1.0)
-    )
-    if should_log:
+    state = (connected, trig)
+    now = time.monotonic()
+    # 状态不变时每秒最多记一条，避免前端轮询刷屏
+    if state != _LAST_PLC_LOG["state"] or now - _LAST_PLC_LOG["ts"] > 1.0:
         if connected:
             if trig == 1:
-                print("[PLC] DB4.DBW0=1，等待截帧")
+                logger.info("[PLC] DB4.DBW0=1，等待截帧")
             else:
-                print(f"[PLC] DB4.DBW0={trig}，未开始识别")
+                logger.info("[PLC] DB4.DBW0=%s，未开始识别", trig)
         else:
-            print("[PLC] 未连接，无法读取 DB4.DBW0")
-        _LAST_PLC_LOG.update({"connected": connected, "trigger": trig, "ts": now})
-    return jsonify(status)
+            logger.info("[PLC] 未连接，无法读取 DB4.DBW0")
+        _LAST_PLC_LOG.update({"state": state, "ts": now})
+    return _json(status)
+
+
+@app.route("/models/reload", methods=["POST"])
+def models_reload():
+    models = model_manager.reload_available()
+    _render_home.cache_clear()
+    _render_index.cache_clear()
+    return _json({"models": models})
+
+
+@app.route("/cache/clear", methods=["POST"])
+def cache_clear():
+    with _PREDICT_CACHE_LOCK:
+        cleared = len(_PREDICT_CACHE)
+        _PREDICT_CACHE.clear()
+    return _json({"cleared": cleared})
 
 
 @app.route("/detect", methods=["POST"])
 def detect():
-    image: Optional[Image.Image] = None
+    image: Optional[np.ndarray] = None
+    img_bytes = b""
     model_name = config.DEFAULT_MODEL
     plc_trigger_hint = 0
 
@@ -99,106 +250,183 @@ def detect():
         model_name = request.form.get("model") or model_name
         plc_trigger_hint = int(request.form.get("plc_trigger") or 0)
         if not file:
-            return jsonify({"error": "缺少图像文件"}), 400
-        try:
-            image = Image.open(file.stream).convert("RGB")
-        except Exception as exc:
-            return jsonify({"error": f"图像解析失败: {exc}"}), 400
+            return _json({"error": "缺少图像文件"}, 400)
+        img_bytes = file.stream.read()
+    elif request.mimetype == "application/octet-stream":
+        # 原始 JPEG 作为请求体，参数走查询串；不经 multipart 解析与 base64 解码
+        model_name = request.args.get("model") or model_name
+        plc_trigger_hint = int(request.args.get("plc_trigger") or 0)
+        img_bytes = request.get_data(cache=False)
+        if not img_bytes:
+            return _json({"error": "缺少图像数据"}, 400)
     else:
+        # JSON + base64 仅用于调试等小图，体积多 1/3 且需整段解码
         payload = request.get_json(force=True, silent=True) or {}
         image_b64 = payload.get("image")
         model_name = payload.get("model") or model_name
         plc_trigger_hint = int(payload.get("plc_trigger") or 0)
         if not image_b64:
-            return jsonify({"error": "缺少图像数据"}), 400
+            return _json({"error": "缺少图像数据"}, 400)
         try:
-            image = _decode_image(image_b64)
+            img_bytes = _b64_bytes(image_b64)
         except Exception as exc:
-            return jsonify({"error": f"图像解析失败: {exc}"}), 400
+            return _json({"error": f"图像解析失败: {exc}"}, 400)
 
     available_models = model_manager.available()
     if available_models:
         if model_name not in available_models:
-            return jsonify({"error": f"模型未找到 {model_name}"}), 400
+            return _json({"error": f"模型未找到 {model_name}"}, 400)
     else:
         model_name = _FALLBACK_MODEL_NAME
 
-    # 未启/掉线时尝试自动重连一次，避免只能手动触发
-    if not plc_manager.connected:
-        plc_manager.ensure_connected()
+    # 同一画面重复触发时命中缓存，跳过解码与推理（PLC 写回照常执行）
+    cache_key = (model_name, hashlib.blake2b(img_bytes, digest_size=16).digest())
+    cached = _cache_get(cache_key)
+    if cached is None:
+        try:
+            image = _decode_bytes(img_bytes)
+        except Exception as exc:
+            return _json({"error": f"图像解析失败: {exc}"}, 400)
+
+    # 后台保活开启时只读连接状态；关闭时未启/掉线则在此自动重连一次
+    plc_connected = plc_manager.ensure_connected()
 
     plc_status_val = None
-    if plc_manager.connected:
+    if plc_connected:
         if plc_trigger_hint == 1 or plc_manager.trigger_recent():
             plc_status_val = 1
-            print("[PLC] 前端已确认 DB4.DBW0=1 或最近已触发，跳过重复读取")
+            logger.info("[PLC] 前端已确认 DB4.DBW0=1 或最近已触发，跳过重复读取")
         else:
             plc_status_val = plc_manager.read_word(0)
             if plc_status_val is None:
-                return jsonify({"error": "PLC 通信异常"}), 500
+                return _json({"error": "PLC 通信异常"}, 500)
             if plc_status_val != 1:
-                print(f"[PLC] DB4.DBW0={plc_status_val}，未开始识别（阻止本次推理）")
-                return jsonify({"error": "PLC 未触发（DB4.DBW0 != 1）", "plc_status": plc_status_val}), 409
-            print("[PLC] DB4.DBW0=1，开始识别当前帧")
+                logger.info("[PLC] DB4.DBW0=%s，未开始识别（阻止本次推理）", plc_status_val)
+                return _json({"error": "PLC 未触发（DB4.DBW0 != 1）", "plc_status": plc_status_val}, 409)
+            logger.info("[PLC] DB4.DBW0=1，开始识别当前帧")
     else:
-        print("[PLC] 未连接，无法读取 DB4.DBW0")
-
-    detections = model_manager.predict(image, model_name)
-    counts: Dict[int, int] = {}
-    best_det: Optional[Detection] = None
-    for det in detections:
-        counts[det.cls_id] = counts.get(det.cls_id, 0) + 1
-        if best_det is None or det.conf > best_det.conf:
-            best_det = det
-    if best_det is None:
+        logger.info("[PLC] 未连接，无法读取 DB4.DBW0")
+
+    if cached is None:
+        try:
+            if _batcher is None:
+                detections = model_manager.predict(image, model_name)
+            else:
+                try:
+                    detections = _batcher.submit(image, model_name, config.DYNAMIC_BATCH_TIMEOUT_SEC)
+                except FutureTimeout:
+                    # 批队列积压：本帧已从队列撤下，改为直接推理，PLC 已确认触发，必须照常写回
+                    logger.warning("[批推理] 等待超时，改为单张推理")
+                    detections = model_manager.predict(image, model_name)
+        except Exception as exc:
+            return _json({"error": f"模型推理失败: {exc}"}, 500)
+        image_size = (image.shape[1], image.shape[0])
+        _cache_put(cache_key, (image_size, detections))
+    else:
+        image_size, detections = cached
+        logger.info("[识别] 命中结果缓存，跳过推理")
+    # 按类别计数（定长数组，下标即 1-based 类别 ID）+ 取置信度最高者，均为一次向量化计算
+    counts_arr = np.bincount(detections.cls_ids, minlength=_COUNT_SLOTS)
+    if len(detections) == 0:
         # 与 main_pro2 一致：未检测到则归类为成品（ID=2）
         best_cls_id = 2
-        counts[best_cls_id] = counts.get(best_cls_id, 0) + 1
-        print("[识别] 未检测到目标，默认归类为成品(ID=2)")
+        counts_arr[best_cls_id] += 1
+        logger.info("[识别] 未检测到目标，默认归类为成品(ID=2)")
     else:
-        best_cls_id = best_det.cls_id
-        print(f"[识别] 检出最优类别 ID={best_cls_id}")
-    total = sum(counts.values())
+        best_cls_id = int(detections.cls_ids[int(detections.confs.argmax())])
+        logger.info("[识别] 检出最优类别 ID=%d", best_cls_id)
+    total = int(counts_arr.sum())
+    counts: Dict[int, int] = {cls_id: count for cls_id, count in enumerate(counts_arr.tolist()) if count}
 
-    # 写回 PLC（DBW2=类别值，DBW0=2），先确保连接
-    plc_connected = plc_manager.ensure_connected()
+    # 写回 PLC（DBW2=类别值，DBW0=2）；沿用请求开始时的连接，PLC 不在线时不再二次等待建连超时
     plc_value = int(best_cls_id)  # model.py 已将 YOLO cls 变为 1-based
-    if plc_connected:
+    if plc_manager.connected:
         ok = plc_manager.write_result(plc_value)
         if ok:
-            print(f"[PLC写入] 已写 DB4.DBW0=2, DB4.DBW2={plc_value}")
+            logger.info("[PLC写入] 已写 DB4.DBW0=2, DB4.DBW2=%d", plc_value)
         else:
-            print(f"[PLC写入] 失败：last_error={plc_manager.last_error}")
+            logger.warning("[PLC写入] 失败：last_error=%s", plc_manager.last_error)
     else:
-        print(f"[PLC写入] 未连接，无法写入 DB4.DBW2={plc_value}/DBW0=2")
+        logger.info("[PLC写入] 未连接，无法写入 DB4.DBW2=%d/DBW0=2", plc_value)
 
-    return jsonify(
+    return _json(
         {
             "model": model_name,
-            "image_size": {"width": image.size[0], "height": image.size[1]},
+            "image_size": {"width": image_size[0], "height": image_size[1]},
             "total": total,
             "counts": counts,
             "best_cls": best_cls_id,
             "plc": plc_manager.status(refresh_trigger=False),
             "plc_trigger": plc_status_val,
             "detections": [
-                {
-                    "cls_id": det.cls_id,
-                    "cls_name": det.cls_name,
-                    "conf": det.conf,
-                    "box": det.box,
-                }
-                for det in detections
+                {"cls_id": cls_id, "cls_name": cls_name, "conf": conf, "box": box}
+                for cls_id, cls_name, conf, box in zip(
+                    detections.cls_ids.tolist(),
+                    detections.cls_names,
+                    detections.confs.tolist(),
+                    detections.boxes.tolist(),
+                )
             ],
         }
     )
 
 
-def _decode_image(image_b64: str) -> Image.Image:
+def _json(payload: Dict, status: int = 200):
+    # orjson 序列化更快；counts 的键是 int，需 OPT_NON_STR_KEYS
+    if orjson is None:
+        return jsonify(payload), status
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _check_pixels(width: int, height: int) -> None:
+    if width * height > config.MAX_IMAGE_PIXELS:
+        raise ValueError(f"图像尺寸过大 {width}x{height}")
+
+
+def _b64_bytes(image_b64: str) -> bytes:
     if "," in image_b64:
         image_b64 = image_b64.split(",", 1)[1]
-    img_bytes = base64.b64decode(image_b64)
-    return Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    return base64.b64decode(image_b64)
+
+
+def _cache_get(key: Tuple[str, bytes]) -> Optional[Tuple[Tuple[int, int], Detections]]:
+    with _PREDICT_CACHE_LOCK:
+        hit = _PREDICT_CACHE.get(key)
+        if hit is not None:
+            _PREDICT_CACHE.move_to_end(key)
+        return hit
+
+
+def _cache_put(key: Tuple[str, bytes], value: Tuple[Tuple[int, int], Detections]) -> None:
+    if config.PREDICT_CACHE_SIZE <= 0:
+        return
+    with _PREDICT_CACHE_LOCK:
+        _PREDICT_CACHE[key] = value
+        _PREDICT_CACHE.move_to_end(key)
+        while len(_PREDICT_CACHE) > config.PREDICT_CACHE_SIZE:
+            _PREDICT_CACHE.popitem(last=False)
+
+
+def _decode_bytes(img_bytes: bytes) -> np.ndarray:
+    # 直接解码为 HxWx3 uint8 数组交给 YOLO，省去中间的 PIL 对象与一次整帧拷贝。
+    # Ultralytics 把 ndarray 视为 BGR（OpenCV 约定），turbojpeg 默认即输出 BGR
+    # 解码前先按头部声明的尺寸拒绝超大图，不为其分配像素内存
+    if _TJ is not None:
+        try:
+            width, height, _, _ = _TJ.decode_header(img_bytes)
+        except Exception:
+            pass
+        else:
+            _check_pixels(width, height)
+            try:
+                return _TJ.decode(img_bytes)
+            except Exception:
+                pass  # 头部可解析但 turbojpeg 无法解码（CMYK/YCCK、无损 JPEG 等），交给 PIL
+    pil_image = Image.open(io.BytesIO(img_bytes))
+    _check_pixels(*pil_image.size)
+    rgb = np.asarray(pil_image.convert("RGB"))
+    return np.ascontiguousarray(rgb[..., ::-1])
 
 
 if __name__ == "__main__":
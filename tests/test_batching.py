@@ -0,0 +1,124 @@
+"""Unit tests for src.batching.DynamicBatcher.
+
+不依赖真实模型：用假的 ModelManager 记录每次 predict_batch 收到的批次，
+"图像"直接用字符串，检测结果原样返回输入，便于核对请求与结果的对应关系。
+"""
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from src.batching import DynamicBatcher
+
+
+class FakeModelManager:
+    def __init__(self, block_on=None):
+        self.loaded = []
+        self.batches = []
+        self.block_on = block_on
+        self.release = threading.Event()
+
+    def get(self, name):
+        self.loaded.append(name)
+        return object()
+
+    def predict_batch(self, images, model_name):
+        self.batches.append((model_name, list(images)))
+        if self.block_on in images:
+            self.release.wait(5)
+        if "boom" in images:
+            raise RuntimeError("inference failed")
+        return [f"{model_name}:{image}" for image in images]
+
+
+def submit_concurrently(batcher, items, timeout=2.0):
+    results = {}
+
+    def worker(image, model_name):
+        try:
+            results[image] = batcher.submit(image, model_name, timeout)
+        except Exception as exc:  # 记录异常以便断言
+            results[image] = exc
+
+    threads = [threading.Thread(target=worker, args=item) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_frames_share_one_forward_pass():
+    manager = FakeModelManager()
+    batcher = DynamicBatcher(manager, max_batch=4, window_sec=0.2)
+
+    results = submit_concurrently(batcher, [(f"img{i}", "m.pt") for i in range(4)])
+
+    assert results == {f"img{i}": f"m.pt:img{i}" for i in range(4)}
+    assert [len(images) for _, images in manager.batches] == [4]
+
+
+def test_batch_size_is_capped():
+    manager = FakeModelManager()
+    batcher = DynamicBatcher(manager, max_batch=2, window_sec=0.2)
+
+    results = submit_concurrently(batcher, [(f"img{i}", "m.pt") for i in range(5)])
+
+    assert results == {f"img{i}": f"m.pt:img{i}" for i in range(5)}
+    sizes = [len(images) for _, images in manager.batches]
+    assert sum(sizes) == 5
+    assert max(sizes) <= 2
+
+
+def test_mixed_models_are_grouped_per_model():
+    manager = FakeModelManager()
+    batcher = DynamicBatcher(manager, max_batch=4, window_sec=0.2)
+
+    results = submit_concurrently(batcher, [("a", "m1.pt"), ("b", "m2.pt"), ("c", "m1.pt")])
+
+    assert results == {"a": "m1.pt:a", "b": "m2.pt:b", "c": "m1.pt:c"}
+    grouped = {model_name: sorted(images) for model_name, images in manager.batches}
+    assert grouped == {"m1.pt": ["a", "c"], "m2.pt": ["b"]}
+
+
+def test_inference_error_reaches_every_caller_in_the_batch():
+    manager = FakeModelManager()
+    batcher = DynamicBatcher(manager, max_batch=4, window_sec=0.2)
+
+    results = submit_concurrently(batcher, [("boom", "m.pt"), ("ok", "m.pt")])
+
+    assert all(isinstance(result, RuntimeError) for result in results.values())
+
+
+def test_model_is_loaded_before_queueing():
+    manager = FakeModelManager()
+    batcher = DynamicBatcher(manager, max_batch=1, window_sec=0.0)
+
+    assert batcher.submit("img", "m.pt", 2.0) == "m.pt:img"
+    assert manager.loaded == ["m.pt"]
+
+
+def test_timed_out_frame_is_cancelled_and_never_inferred():
+    manager = FakeModelManager(block_on="slow")
+    batcher = DynamicBatcher(manager, max_batch=1, window_sec=0.0)
+    slow = threading.Thread(target=batcher.submit, args=("slow", "m.pt", 5.0))
+    slow.start()
+    while not manager.batches:
+        time.sleep(0.005)
+
+    with pytest.raises(FutureTimeout):
+        batcher.submit("late", "m.pt", 0.05)
+
+    manager.release.set()
+    slow.join(5)
+    time.sleep(0.1)
+    assert [images for _, images in manager.batches] == [["slow"]]
+
+
+def test_running_frame_is_awaited_past_the_timeout():
+    manager = FakeModelManager(block_on="slow")
+    batcher = DynamicBatcher(manager, max_batch=1, window_sec=0.0)
+    threading.Timer(0.2, manager.release.set).start()
+
+    assert batcher.submit("slow", "m.pt", 0.05) == "m.pt:slow"
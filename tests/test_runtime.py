@@ -0,0 +1,55 @@
+"""Unit tests for src.runtime.export_runtime failure caching.
+
+用假的 YOLO 类代替 ultralytics：export 固定抛错并记录调用次数，权重文件为临时目录中的空文件。
+"""
+import os
+
+import pytest
+
+from src import config, runtime
+
+
+class FailingYOLO:
+    exports = 0
+
+    def __init__(self, path, task=None):
+        self.path = path
+
+    def export(self, **kwargs):
+        type(self).exports += 1
+        raise RuntimeError("TensorRT not installed")
+
+
+@pytest.fixture
+def weights(tmp_path, monkeypatch):
+    FailingYOLO.exports = 0
+    monkeypatch.setattr(runtime, "YOLO", FailingYOLO)
+    monkeypatch.setattr(config, "YOLO_BACKEND", "engine")
+    path = tmp_path / "yolo_rs.pt"
+    path.write_bytes(b"")
+    return path
+
+
+def test_failed_export_falls_back_and_is_not_retried(weights):
+    assert runtime.export_runtime(weights) == weights
+    assert runtime.export_runtime(weights) == weights
+    assert FailingYOLO.exports == 1
+    assert (weights.parent / "yolo_rs.engine.export_failed").exists()
+
+
+def test_updated_weights_retry_the_export(weights):
+    runtime.export_runtime(weights)
+    marker = weights.parent / "yolo_rs.engine.export_failed"
+    stat = marker.stat()
+    os.utime(weights, (stat.st_atime, stat.st_mtime + 10))
+
+    assert runtime.export_runtime(weights) == weights
+    assert FailingYOLO.exports == 2
+
+
+def test_fresh_artifact_is_used_without_exporting(weights):
+    engine = weights.with_suffix(".engine")
+    engine.write_bytes(b"")
+
+    assert runtime.export_runtime(weights) == engine
+    assert FailingYOLO.exports == 0
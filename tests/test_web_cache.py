@@ -0,0 +1,57 @@
+"""Unit tests for the /detect result LRU in src.web (_cache_get / _cache_put)."""
+import pytest
+
+from src import config, web
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(config, "PREDICT_CACHE_SIZE", 2)
+    web._PREDICT_CACHE.clear()
+    yield
+    web._PREDICT_CACHE.clear()
+
+
+def key(n):
+    return ("yolo_rs.pt", bytes([n]) * 16)
+
+
+def test_put_then_get_returns_the_stored_value():
+    web._cache_put(key(1), ((640, 480), "dets"))
+
+    assert web._cache_get(key(1)) == ((640, 480), "dets")
+    assert web._cache_get(key(2)) is None
+
+
+def test_oldest_entry_is_evicted_when_full():
+    web._cache_put(key(1), "a")
+    web._cache_put(key(2), "b")
+    web._cache_put(key(3), "c")
+
+    assert web._cache_get(key(1)) is None
+    assert web._cache_get(key(2)) == "b"
+    assert web._cache_get(key(3)) == "c"
+
+
+def test_get_refreshes_recency():
+    web._cache_put(key(1), "a")
+    web._cache_put(key(2), "b")
+    web._cache_get(key(1))
+    web._cache_put(key(3), "c")
+
+    assert web._cache_get(key(1)) == "a"
+    assert web._cache_get(key(2)) is None
+
+
+def test_same_image_under_another_model_is_a_separate_entry():
+    web._cache_put(("m1.pt", b"x" * 16), "m1")
+
+    assert web._cache_get(("m2.pt", b"x" * 16)) is None
+
+
+def test_zero_size_disables_the_cache(monkeypatch):
+    monkeypatch.setattr(config, "PREDICT_CACHE_SIZE", 0)
+    web._cache_put(key(1), "a")
+
+    assert web._cache_get(key(1)) is None
+    assert len(web._PREDICT_CACHE) == 0
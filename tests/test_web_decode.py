@@ -0,0 +1,108 @@
+"""Unit tests for src.web._decode_bytes: size limits, PIL fallback and BGR output.
+
+图像均在内存中用 PIL 生成；turbojpeg 路径用假的解码器对象替换 web._TJ，
+以便在未安装 libjpeg-turbo 的环境中也能覆盖按头部尺寸拒绝与回退逻辑。
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import config, web
+
+RED = (255, 0, 0)
+
+
+def encode(size, fmt, color=RED):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+class FakeTurboJPEG:
+    def __init__(self, header=None, decoded=None, decode_error=None):
+        self.header = header
+        self.decoded = decoded
+        self.decode_error = decode_error
+        self.decode_calls = 0
+
+    def decode_header(self, img_bytes):
+        if self.header is None:
+            raise OSError("not a JPEG")
+        return self.header
+
+    def decode(self, img_bytes):
+        self.decode_calls += 1
+        if self.decode_error is not None:
+            raise self.decode_error
+        return self.decoded
+
+
+@pytest.fixture
+def no_turbojpeg(monkeypatch):
+    monkeypatch.setattr(web, "_TJ", None)
+
+
+def test_pil_path_returns_bgr_uint8(no_turbojpeg):
+    image = web._decode_bytes(encode((4, 3), "PNG"))
+
+    assert image.shape == (3, 4, 3)
+    assert image.dtype == np.uint8
+    assert image.flags["C_CONTIGUOUS"]
+    assert image[0, 0].tolist() == [0, 0, 255]
+
+
+def test_pil_path_decodes_jpeg(no_turbojpeg):
+    image = web._decode_bytes(encode((16, 8), "JPEG"))
+
+    assert image.shape == (8, 16, 3)
+    blue, green, red = image[4, 8].tolist()
+    assert red > 200 and green < 50 and blue < 50
+
+
+def test_pil_path_rejects_oversized_image_from_header(no_turbojpeg, monkeypatch):
+    monkeypatch.setattr(config, "MAX_IMAGE_PIXELS", 99)
+
+    with pytest.raises(ValueError, match="图像尺寸过大"):
+        web._decode_bytes(encode((10, 10), "PNG"))
+
+
+def test_turbojpeg_rejects_oversized_image_without_decoding(monkeypatch):
+    fake = FakeTurboJPEG(header=(10000, 10000, 0, 0))
+    monkeypatch.setattr(web, "_TJ", fake)
+
+    with pytest.raises(ValueError, match="10000x10000"):
+        web._decode_bytes(b"\xff\xd8")
+    assert fake.decode_calls == 0
+
+
+def test_turbojpeg_result_is_returned_as_is(monkeypatch):
+    decoded = np.zeros((2, 2, 3), np.uint8)
+    monkeypatch.setattr(web, "_TJ", FakeTurboJPEG(header=(2, 2, 0, 0), decoded=decoded))
+
+    assert web._decode_bytes(b"\xff\xd8") is decoded
+
+
+def test_falls_back_to_pil_when_turbojpeg_cannot_decode(monkeypatch):
+    # 头部可解析但解码失败（如 CMYK / 无损 JPEG）
+    fake = FakeTurboJPEG(header=(4, 3, 0, 0), decode_error=OSError("unsupported colorspace"))
+    monkeypatch.setattr(web, "_TJ", fake)
+
+    image = web._decode_bytes(encode((4, 3), "PNG"))
+
+    assert fake.decode_calls == 1
+    assert image[0, 0].tolist() == [0, 0, 255]
+
+
+def test_falls_back_to_pil_for_non_jpeg(monkeypatch):
+    monkeypatch.setattr(web, "_TJ", FakeTurboJPEG(header=None))
+
+    image = web._decode_bytes(encode((4, 3), "PNG"))
+
+    assert image.shape == (3, 4, 3)
+
+
+def test_invalid_bytes_raise(no_turbojpeg):
+    with pytest.raises(Exception):
+        web._decode_bytes(b"not an image")